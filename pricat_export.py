@@ -5,11 +5,11 @@ from typing import List, Dict, Any
 # Configure logging
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 
+REQUIRED_FIELDS = ("message_ref", "doc_code", "doc_number", "parties", "items")
+
 def validate_data(data: Dict[str, Any]) -> None:
     """Validate required fields in PRICAT data."""
-    required_fields = ["message_ref", "doc_code", "doc_number", "parties", "items"]
-    
-    for field in required_fields:
+    for field in REQUIRED_FIELDS:
         if field not in data or not data[field]:
             raise ValueError(f"Missing required field: {field}")
 
@@ -54,10 +54,12 @@ def generate_pricat(data: Dict[str, Any], filename: str = "pricat.edi") -> str:
         if "product_code" not in item or "description" not in item or "price" not in item:
             logging.warning("Skipping item due to missing fields: %s", item)
             continue
-        edifact.append(f"LIN+{index}++{item['product_code']}:EN'")
-        edifact.append(f"IMD+F++:::{item['description']}'")
-        edifact.append(f"PRI+AAA:{item['price']}:UP'")
-        edifact.append(f"PRI+AAB:{item['price']}:UP'")
+        edifact.extend((
+            f"LIN+{index}++{item['product_code']}:EN'",
+            f"IMD+F++:::{item['description']}'",
+            f"PRI+AAA:{item['price']}:UP'",
+            f"PRI+AAB:{item['price']}:UP'"
+        ))
         total_amount += float(item['price'])
     
     # Monetary Amount (MOA) - Total price
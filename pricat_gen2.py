@@ -4,11 +4,11 @@ import logging
 # Configure logging
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 
+REQUIRED_FIELDS = ("message_ref", "doc_code", "doc_number", "parties", "items")
+
 def validate_data(data):
     """Validate required fields in PRICAT data."""
-    required_fields = ["message_ref", "doc_code", "doc_number", "parties", "items"]
-    
-    for field in required_fields:
+    for field in REQUIRED_FIELDS:
         if field not in data or not data[field]:
             raise ValueError(f"Missing required field: {field}")
 
@@ -17,13 +17,6 @@ def validate_data(data):
 
     logging.info("Data validation passed.")
 
-def format_price(price):
-    """Ensure price is formatted correctly as a float with two decimals."""
-    try:
-        return f"{float(price):.2f}"
-    except ValueError:
-        raise ValueError(f"Invalid price format: {price}")
-
 def generate_pricat(data):
     """Generate an EDIFACT PRICAT message from structured data."""
     
@@ -40,21 +33,17 @@ def generate_pricat(data):
         "UNA:+.? '",  # Service string advice
         f"UNH+{data['message_ref']}+PRICAT:D:96A:UN'"
     ]
-    logging.info("Added UNH segment.")
 
     # BGM - Beginning of Message
     edifact.append(f"BGM+{data['doc_code']}+{data['doc_number']}+9'")
-    logging.info("Added BGM segment.")
 
     # DTM - Date/Time
     current_date = datetime.datetime.now().strftime('%Y%m%d')
     edifact.append(f"DTM+137:{current_date}:102'")
-    logging.info("Added DTM segment with date: %s", current_date)
 
     # CUX - Currency (Example: EUR)
     currency = data.get("currency", "EUR")  # Default to EUR if not provided
     edifact.append(f"CUX+2:{currency}:9'")
-    logging.info("Added CUX segment with currency: %s", currency)
 
     # NAD - Party Information
     for party in data['parties']:
@@ -63,7 +52,6 @@ def generate_pricat(data):
             continue  # Skip invalid parties
 
         edifact.append(f"NAD+{party['qualifier']}+{party['id']}::91'")
-        logging.info("Added NAD segment for %s", party["qualifier"])
 
     # LIN - Line Items
     for index, item in enumerate(data['items'], start=1):
@@ -74,20 +62,21 @@ def generate_pricat(data):
         edifact.append(f"LIN+{index}++{item['product_code']}:EN'")
         edifact.append(f"IMD+F++::: {item['description']}'")
 
+        # Price formatted as a float with two decimals
         try:
-            price = format_price(item['price'])
-            edifact.append(f"PRI+AAA:{price}:UP'")  # AAA = Net price
-            edifact.append(f"PRI+AAB:{price}:UP'")  # AAB = Gross price
-        except ValueError as e:
-            logging.error(e)
+            price = f"{float(item['price']):.2f}"
+        except ValueError:
+            logging.error("Invalid price format: %s", item['price'])
             continue  # Skip invalid price
 
-        logging.info("Added LIN segment for item %d: %s", index, item["product_code"])
+        edifact.extend((
+            f"PRI+AAA:{price}:UP'",  # AAA = Net price
+            f"PRI+AAB:{price}:UP'"   # AAB = Gross price
+        ))
 
     # UNT - Message Trailer
     segment_count = len(edifact) - 1  # Excluding UNA
     edifact.append(f"UNT+{segment_count}+{data['message_ref']}'")
-    logging.info("Added UNT segment with segment count: %d", segment_count)
 
     logging.info("PRICAT message generated successfully.")
     return "\n".join(edifact)
@@ -1,6 +1,6 @@
 import datetime
 import logging
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, FrozenSet, Optional, Tuple
 from decimal import Decimal, InvalidOperation
 
 # Configure logging
@@ -13,6 +13,16 @@ logging.basicConfig(
     ]
 )
 
+REQUIRED_FIELDS: Dict[str, type] = {
+    "message_ref": str,
+    "doc_code": str,
+    "doc_number": str,
+    "parties": list,
+    "items": list
+}
+REQUIRED_PARTY_KEYS: FrozenSet[str] = frozenset(("qualifier", "id"))
+REQUIRED_ITEM_KEYS: FrozenSet[str] = frozenset(("product_code", "description", "price"))
+
 def validate_price(price: Any) -> Decimal:
     """Validate and convert price to Decimal."""
     try:
@@ -25,15 +35,7 @@ def validate_price(price: Any) -> Decimal:
 
 def validate_data(data: Dict[str, Any]) -> None:
     """Validate PRICAT data structure and content."""
-    required_fields = {
-        "message_ref": str,
-        "doc_code": str,
-        "doc_number": str,
-        "parties": list,
-        "items": list
-    }
-    
-    for field, field_type in required_fields.items():
+    for field, field_type in REQUIRED_FIELDS.items():
         if field not in data:
             raise ValueError(f"Missing required field: {field}")
         if not isinstance(data[field], field_type):
@@ -42,42 +44,58 @@ def validate_data(data: Dict[str, Any]) -> None:
             raise ValueError(f"Field {field} cannot be empty")
 
     for party in data["parties"]:
-        if not all(k in party for k in ("qualifier", "id")):
+        if not REQUIRED_PARTY_KEYS <= party.keys():
             raise ValueError("Each party must have 'qualifier' and 'id'")
 
     for item in data["items"]:
-        if not all(k in item for k in ("product_code", "description", "price")):
+        if not REQUIRED_ITEM_KEYS <= item.keys():
             raise ValueError("Each item requires product_code, description and price")
         validate_price(item["price"])
 
-def generate_edi_segments(data: Dict[str, Any]) -> Tuple[List[str], Decimal, int]:
-    """Generate EDIFACT segments and calculate totals."""
+def generate_edi_segments(data: Dict[str, Any]) -> Tuple[List[str], Decimal, int, int, str]:
+    """Generate EDIFACT segments and calculate totals.
+
+    Each item is emitted as one newline-joined chunk holding its four
+    LIN/IMD/PRI/PRI segments, so the returned segment count is tracked
+    separately from the list length.
+    """
+    today = datetime.date.today().strftime("%Y%m%d")
+    currency = data.get("currency", "EUR")
+    doc_number = data["doc_number"]
     segments = [
         "UNA:+.? '",
         f"UNH+{data['message_ref']}+PRICAT:D:96A:UN'",
-        f"BGM+{data['doc_code']}+{data['doc_number']}+9'",
-        f"DTM+137:{datetime.datetime.now().strftime('%Y%m%d')}:102'",
-        f"CUX+2:{data.get('currency', 'EUR')}:9'",
-        f"RFF+ON:{data['doc_number']}'"
+        f"BGM+{data['doc_code']}+{doc_number}+9'",
+        f"DTM+137:{today}:102'",
+        f"CUX+2:{currency}:9'",
+        f"RFF+ON:{doc_number}'"
     ]
     
-    for party in data['parties']:
-        segments.append(f"NAD+{party['qualifier']}+{party['id']}::91'")
+    # All NAD segments go in as one newline-joined chunk
+    parties = data['parties']
+    if parties:
+        segments.append("\n".join([f"NAD+{party['qualifier']}+{party['id']}::91'" for party in parties]))
     
+    segment_count = 5 + len(parties)  # UNH through RFF, plus one NAD per party
     total_amount = Decimal("0.00")
     item_count = 0
+    append = segments.append
     
     for index, item in enumerate(data['items'], start=1):
         try:
             price = validate_price(item["price"])
+            product_code = item["product_code"]
+            description = item["description"]
+            price_str = f"{price:.2f}"
             
-            segments.extend([
-                f"LIN+{index}++{item['product_code']}:EN'",
-                f"IMD+F++:::{item['description']}'",
-                f"PRI+AAA:{price:.2f}:UP'",
-                f"PRI+AAB:{price:.2f}:UP'"
-            ])
+            append(
+                f"LIN+{index}++{product_code}:EN'\n"
+                f"IMD+F++:::{description}'\n"
+                f"PRI+AAA:{price_str}:UP'\n"
+                f"PRI+AAB:{price_str}:UP'"
+            )
             
+            segment_count += 4
             total_amount += price
             item_count += 1
             
@@ -85,20 +103,19 @@ def generate_edi_segments(data: Dict[str, Any]) -> Tuple[List[str], Decimal, int
             logging.warning("Skipping item %d: %s", index, e)
             continue
     
-    return segments, total_amount, item_count
+    return segments, total_amount, item_count, segment_count, currency
 
 def generate_pricat(data: Dict[str, Any], filename: Optional[str] = "pricat.edi") -> str:
     """Generate and optionally save an EDIFACT PRICAT message."""
     try:
         validate_data(data)
-        segments, total_amount, item_count = generate_edi_segments(data)
+        segments, total_amount, item_count, segment_count, currency = generate_edi_segments(data)
         
         # Add footer segments
-        currency = data.get("currency", "EUR")
-        segments.extend([
+        segments.extend((
             f"MOA+86:{total_amount:.2f}:{currency}'",
-            f"UNT+{len(segments)-1}+{data['message_ref']}'"
-        ])
+            f"UNT+{segment_count}+{data['message_ref']}'"
+        ))
         
         edifact_message = "\n".join(segments)
         
@@ -2,7 +2,7 @@ import datetime
 import logging
 import os
 import re
-from typing import List, Dict, Any, Optional, Tuple, Set
+from typing import List, Dict, Any, FrozenSet, NamedTuple, Optional, Tuple, Set, Union
 from decimal import Decimal, InvalidOperation
 
 # Configure logging
@@ -19,6 +19,28 @@ logging.basicConfig(
 VALID_CURRENCIES: Set[str] = {"EUR", "USD", "GBP", "JPY"}
 # Valid EDIFACT party qualifiers
 VALID_QUALIFIERS: Set[str] = {"BY", "SU", "SE"}
+# EDIFACT version format (e.g., "D:96A:UN")
+EDIFACT_VERSION_RE = re.compile(r"^[A-Z]:\d{2}[A-Z]:UN$")
+# Top-level PRICAT fields and their expected types
+REQUIRED_FIELDS: Dict[str, type] = {
+    "message_ref": str,
+    "doc_code": str,
+    "doc_number": str,
+    "parties": list,
+    "items": list,
+    "edifact_version": str  # Added for configurable EDIFACT version
+}
+# Keys every party and item entry must provide
+REQUIRED_PARTY_KEYS: FrozenSet[str] = frozenset(("qualifier", "id"))
+REQUIRED_ITEM_KEYS: FrozenSet[str] = frozenset(("product_code", "description", "price"))
+
+class ValidatedItem(NamedTuple):
+    """A PRICAT line item that has passed validation, with its price already converted."""
+    index: int
+    product_code: str
+    description: str
+    price: Decimal
+    quantity: Optional[Union[int, float]]
 
 def validate_price(price: Any) -> Decimal:
     """Validate and convert price to Decimal.
@@ -40,7 +62,34 @@ def validate_price(price: Any) -> Decimal:
     except (InvalidOperation, TypeError) as e:
         raise ValueError(f"Invalid price value: {price}") from e
 
-def validate_data(data: Dict[str, Any], valid_qualifiers: Set[str] = VALID_QUALIFIERS, valid_currencies: Set[str] = VALID_CURRENCIES) -> None:
+def validate_item(index: int, item: Dict[str, Any]) -> ValidatedItem:
+    """Validate a single line item and convert its price.
+
+    Args:
+        index: 1-based position of the item in the PRICAT, used as the LIN line number.
+        item: Dictionary containing item data.
+
+    Returns:
+        ValidatedItem: The validated item.
+
+    Raises:
+        ValueError: If the item is invalid.
+    """
+    if not REQUIRED_ITEM_KEYS <= item.keys():
+        raise ValueError("Each item requires product_code, description, and price")
+    if not isinstance(item["product_code"], str) or not item["product_code"]:
+        raise ValueError("Product code must be a non-empty string")
+    if not isinstance(item["description"], str) or not item["description"]:
+        raise ValueError("Description must be a non-empty string")
+    price = validate_price(item["price"])
+    # Validate optional quantity if present
+    quantity = item.get("quantity")
+    if "quantity" in item:
+        if not isinstance(quantity, (int, float)) or quantity <= 0:
+            raise ValueError("Quantity must be a positive number")
+    return ValidatedItem(index, item["product_code"], item["description"], price, quantity)
+
+def validate_data(data: Dict[str, Any], valid_qualifiers: Set[str] = VALID_QUALIFIERS, valid_currencies: Set[str] = VALID_CURRENCIES) -> List[ValidatedItem]:
     """Validate PRICAT data structure and content.
 
     Args:
@@ -48,19 +97,13 @@ def validate_data(data: Dict[str, Any], valid_qualifiers: Set[str] = VALID_QUALI
         valid_qualifiers: Set of allowed party qualifiers (default: {'BY', 'SU', 'SE'}).
         valid_currencies: Set of allowed currency codes (default: {'EUR', 'USD', 'GBP', 'JPY'}).
 
+    Returns:
+        List[ValidatedItem]: The validated items, ready for generate_edi_segments.
+
     Raises:
         ValueError: If validation fails.
     """
-    required_fields = {
-        "message_ref": str,
-        "doc_code": str,
-        "doc_number": str,
-        "parties": list,
-        "items": list,
-        "edifact_version": str  # Added for configurable EDIFACT version
-    }
-
-    for field, field_type in required_fields.items():
+    for field, field_type in REQUIRED_FIELDS.items():
         if field not in data:
             raise ValueError(f"Missing required field: {field}")
         if not isinstance(data[field], field_type):
@@ -69,7 +112,7 @@ def validate_data(data: Dict[str, Any], valid_qualifiers: Set[str] = VALID_QUALI
             raise ValueError(f"Field {field} cannot be empty")
 
     # Validate EDIFACT version format (e.g., "D:96A:UN")
-    if not re.match(r"^[A-Z]:\d{2}[A-Z]:UN$", data.get("edifact_version", "D:96A:UN")):
+    if not EDIFACT_VERSION_RE.match(data.get("edifact_version", "D:96A:UN")):
         raise ValueError("Invalid EDIFACT version format")
 
     # Validate currency
@@ -78,82 +121,100 @@ def validate_data(data: Dict[str, Any], valid_qualifiers: Set[str] = VALID_QUALI
         raise ValueError(f"Invalid currency code: {currency}. Must be one of {valid_currencies}")
 
     for party in data["parties"]:
-        if not all(k in party for k in ("qualifier", "id")):
+        if not REQUIRED_PARTY_KEYS <= party.keys():
             raise ValueError("Each party must have 'qualifier' and 'id'")
         if party["qualifier"] not in valid_qualifiers:
             raise ValueError(f"Invalid party qualifier: {party['qualifier']}. Must be one of {valid_qualifiers}")
         if not isinstance(party["id"], str) or not party["id"]:
             raise ValueError("Party ID must be a non-empty string")
 
-    for item in data["items"]:
-        if not all(k in item for k in ("product_code", "description", "price")):
-            raise ValueError("Each item requires product_code, description, and price")
-        if not isinstance(item["product_code"], str) or not item["product_code"]:
-            raise ValueError("Product code must be a non-empty string")
-        if not isinstance(item["description"], str) or not item["description"]:
-            raise ValueError("Description must be a non-empty string")
-        validate_price(item["price"])
-        # Validate optional quantity if present
-        if "quantity" in item:
-            if not isinstance(item["quantity"], (int, float)) or item["quantity"] <= 0:
-                raise ValueError("Quantity must be a positive number")
-
-def generate_edi_segments(data: Dict[str, Any], strict: bool = False) -> Tuple[List[str], Decimal, int]:
+    return [validate_item(index, item) for index, item in enumerate(data["items"], start=1)]
+
+def generate_edi_segments(
+    data: Dict[str, Any],
+    strict: bool = False,
+    items: Optional[List[ValidatedItem]] = None
+) -> Tuple[List[str], Decimal, int, int, str]:
     """Generate EDIFACT segments and calculate totals.
 
+    Each item's LIN/IMD/PRI/PRI segments are emitted as a single newline-joined
+    chunk, so the segment count is tracked separately from the list length.
+
     Args:
         data: Dictionary containing PRICAT data.
         strict: If True, raise an exception on invalid items instead of skipping (default: False).
+        items: Items already returned by validate_data. If None, items are validated here.
 
     Returns:
-        Tuple[List[str], Decimal, int]: List of EDIFACT segments, total amount, and item count.
+        Tuple[List[str], Decimal, int, int, str]: List of EDIFACT segment chunks, total amount,
+        item count, segment count (excluding UNA), and currency code.
 
     Raises:
         ValueError: If strict=True and an item is invalid.
     """
+    today = datetime.date.today().strftime("%Y%m%d")
+    currency = data.get("currency", "EUR")
+    doc_number = data["doc_number"]
+    edifact_version = data.get("edifact_version", "D:96A:UN")
     segments = [
         "UNA:+.? '",
-        f"UNH+{data['message_ref']}+PRICAT:{data.get('edifact_version', 'D:96A:UN')}'",
-        f"BGM+{data['doc_code']}+{data['doc_number']}+9'",
-        f"DTM+137:{datetime.datetime.now().strftime('%Y%m%d')}:102'",
-        f"CUX+2:{data.get('currency', 'EUR')}:9'",
-        f"RFF+ON:{data['doc_number']}'"
+        f"UNH+{data['message_ref']}+PRICAT:{edifact_version}'",
+        f"BGM+{data['doc_code']}+{doc_number}+9'",
+        f"DTM+137:{today}:102'",
+        f"CUX+2:{currency}:9'",
+        f"RFF+ON:{doc_number}'"
     ]
     
-    for party in data['parties']:
-        segments.append(f"NAD+{party['qualifier']}+{party['id']}::91'")
-        logging.debug("Added party segment: NAD+%s+%s::91", party['qualifier'], party['id'])
+    # Resolve the debug level once so per-item log calls cost nothing when disabled
+    debug = logging.getLogger().isEnabledFor(logging.DEBUG)
     
+    # All NAD segments go in as one newline-joined chunk
+    parties = data['parties']
+    if parties:
+        segments.append("\n".join([f"NAD+{party['qualifier']}+{party['id']}::91'" for party in parties]))
+    if debug:
+        for party in parties:
+            logging.debug("Added party segment: NAD+%s+%s::91", party['qualifier'], party['id'])
+    
+    if items is None:
+        items = []
+        for index, item in enumerate(data['items'], start=1):
+            try:
+                items.append(validate_item(index, item))
+            except (KeyError, ValueError) as e:
+                logging.warning("Invalid item %d (%s): %s", index, item.get('product_code', 'unknown'), e)
+                if strict:
+                    raise ValueError(f"Invalid item {index} ({item.get('product_code', 'unknown')}): {e}")
+    
+    segment_count = 5 + len(parties)  # UNH through RFF, plus one NAD per party
     total_amount = Decimal("0.00")
     item_count = 0
+    append = segments.append
     
-    for index, item in enumerate(data['items'], start=1):
-        try:
-            price = validate_price(item["price"])
-            
-            segments.extend([
-                f"LIN+{index}++{item['product_code']}:EN'",
-                f"IMD+F++:::{item['description']}'",
-                f"PRI+AAA:{price:.2f}:UP'",
-                f"PRI+AAB:{price:.2f}:UP'"
-            ])
-            
-            # Add optional quantity segment
-            if "quantity" in item:
-                segments.append(f"QTY+47:{item['quantity']}:PCE'")
-                logging.debug("Added quantity segment for item %d: %s", index, item['product_code'])
-            
-            total_amount += price
-            item_count += 1
-            logging.debug("Added item %d: %s, price: %.2f", index, item['product_code'], price)
-            
-        except (KeyError, ValueError) as e:
-            logging.warning("Invalid item %d (%s): %s", index, item.get('product_code', 'unknown'), e)
-            if strict:
-                raise ValueError(f"Invalid item {index} ({item.get('product_code', 'unknown')}): {e}")
-            continue
+    for index, product_code, description, price, quantity in items:
+        price_str = f"{price:.2f}"
+        
+        append(
+            f"LIN+{index}++{product_code}:EN'\n"
+            f"IMD+F++:::{description}'\n"
+            f"PRI+AAA:{price_str}:UP'\n"
+            f"PRI+AAB:{price_str}:UP'"
+        )
+        segment_count += 4
+        
+        # Add optional quantity segment
+        if quantity is not None:
+            append(f"QTY+47:{quantity}:PCE'")
+            segment_count += 1
+            if debug:
+                logging.debug("Added quantity segment for item %d: %s", index, product_code)
+        
+        total_amount += price
+        item_count += 1
+        if debug:
+            logging.debug("Added item %d: %s, price: %.2f", index, product_code, price)
     
-    return segments, total_amount, item_count
+    return segments, total_amount, item_count, segment_count, currency
 
 def generate_pricat(data: Dict[str, Any], filename: Optional[str] = "pricat.edi", overwrite: bool = False) -> str:
     """Generate and optionally save an EDIFACT PRICAT message.
@@ -171,15 +232,14 @@ def generate_pricat(data: Dict[str, Any], filename: Optional[str] = "pricat.edi"
         OSError: If file writing fails.
     """
     try:
-        validate_data(data)
-        segments, total_amount, item_count = generate_edi_segments(data)
+        items = validate_data(data)
+        segments, total_amount, item_count, segment_count, currency = generate_edi_segments(data, items=items)
         
         # Add footer segments
-        currency = data.get("currency", "EUR")
-        segments.extend([
+        segments.extend((
             f"MOA+86:{total_amount:.2f}:{currency}'",
-            f"UNT+{len(segments)-1}+{data['message_ref']}'"
-        ])
+            f"UNT+{segment_count}+{data['message_ref']}'"
+        ))
         
         edifact_message = "\n".join(segments)
         
@@ -1,63 +1,135 @@
 #!/usr/bin/env python3
 import datetime
+import io
 import logging
 import os
 import re
-from typing import List, Dict, Any, Optional, Tuple, Set
+from dataclasses import dataclass
+from typing import List, Dict, Any, FrozenSet, NamedTuple, Optional, TextIO, Tuple, Set, Union
 from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
 
-# Setup logger
-logger = logging.getLogger(__name__)
+class NullLogger:
+    """Logger stand-in whose methods discard their arguments without touching logging."""
+
+    def isEnabledFor(self, level: int) -> bool:
+        return False
+
+    def _discard(self, *args: Any, **kwargs: Any) -> None:
+        pass
+
+    debug = info = warning = error = exception = critical = _discard
+
+# Setup logger; PRICAT_LOG_LEVEL=OFF skips logging setup and makes every log call a no-op
 log_level = os.getenv("PRICAT_LOG_LEVEL", "INFO").upper()
-logging.basicConfig(
-    level=log_level,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler("pricat_generator.log")
-    ]
-)
+if log_level == "OFF":
+    logger = NullLogger()
+else:
+    logger = logging.getLogger(__name__)
+    logging.basicConfig(
+        level=log_level,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+        handlers=[
+            logging.StreamHandler(),
+            logging.FileHandler("pricat_generator.log")
+        ]
+    )
 
 # EDIFACT Constants
 UNA_SEGMENT = "UNA:+.? '"
 SEG_SEPARATOR = "'"
-ESCAPE_CHAR = "?"  # Not fully implemented (EDIFACT escaping is context-sensitive)
+ESCAPE_CHAR = "?"
+# Characters reserved by UNA_SEGMENT (component/element separators, release
+# character, segment terminator), each prefixed with the release character
+ESCAPE_TABLE = str.maketrans({c: ESCAPE_CHAR + c for c in (":", "+", ESCAPE_CHAR, SEG_SEPARATOR)})
 
 VALID_CURRENCIES: Set[str] = {"EUR", "USD", "GBP", "JPY"}
 VALID_QUALIFIERS: Set[str] = {"BY", "SU", "SE"}
+EDIFACT_VERSION_RE = re.compile(r"^[A-Z]:\d{2}[A-Z]:UN$")
+REQUIRED_FIELDS: Dict[str, type] = {
+    "message_ref": str,
+    "doc_code": str,
+    "doc_number": str,
+    "parties": list,
+    "items": list,
+    "edifact_version": str
+}
+REQUIRED_PARTY_KEYS: FrozenSet[str] = frozenset(("qualifier", "id"))
+REQUIRED_ITEM_KEYS: FrozenSet[str] = frozenset(("product_code", "description", "price"))
 
 class PRICATValidationError(ValueError):
     """Custom exception for PRICAT validation errors."""
     pass
 
+class ValidatedItem(NamedTuple):
+    """Line item that passed validation, with its price already converted to cents."""
+    index: int
+    product_code: str
+    description: str
+    price_cents: int
+    quantity: Optional[Union[int, float]]
+    unit: str
+
+@dataclass(frozen=True)
+class PricatResult:
+    """Generated PRICAT message, with its UTF-8 encoding computed once for file or network output."""
+    text: str
+    payload: bytes
+
+    def __bool__(self) -> bool:
+        return bool(self.text)
+
+EMPTY_RESULT = PricatResult("", b"")
+
 def escape_edifact(text: str) -> str:
     """Escape EDIFACT reserved characters in text."""
-    return text.replace("'", "?+")
+    return text.translate(ESCAPE_TABLE)
+
+def format_cents(cents: int) -> str:
+    """Format a non-negative amount in cents as a two-decimal string."""
+    return f"{cents // 100}.{cents % 100:02d}"
 
-def validate_price(price: Any) -> Decimal:
+def format_item_segments(index: int, product_code: str, description: str, price_str: str) -> str:
+    """Build the LIN/IMD/PRI/PRI segment block for one item, newline-terminated."""
+    return (
+        f"LIN+{index}++{product_code}:EN'\n"
+        f"IMD+F++:::{description}'\n"
+        f"PRI+AAA:{price_str}:UP'\n"
+        f"PRI+AAB:{price_str}:UP'\n"
+    )
+
+def validate_price(price: Any) -> int:
+    """Validate a price and return it as integer cents, rounded half-up."""
     try:
         price_decimal = Decimal(str(price)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
         if price_decimal < 0:
             raise PRICATValidationError("Price cannot be negative")
-        return price_decimal
+        return int(price_decimal * 100)
     except (InvalidOperation, TypeError) as e:
         raise PRICATValidationError(f"Invalid price value: {price}") from e
 
-def validate_data(
+def validate_item(index: int, item: Dict[str, Any]) -> ValidatedItem:
+    if not REQUIRED_ITEM_KEYS <= item.keys():
+        raise PRICATValidationError("Each item requires product_code, description, and price")
+    if not isinstance(item["product_code"], str) or not item["product_code"]:
+        raise PRICATValidationError("Product code must be a non-empty string")
+    if not isinstance(item["description"], str) or not item["description"]:
+        raise PRICATValidationError("Description must be a non-empty string")
+    price_cents = validate_price(item["price"])
+    quantity = item.get("quantity")
+    if "quantity" in item:
+        if not isinstance(quantity, (int, float)) or quantity <= 0:
+            raise PRICATValidationError("Quantity must be a positive number")
+    return ValidatedItem(
+        index, item["product_code"], item["description"], price_cents, quantity, item.get("unit", "PCE")
+    )
+
+def validate_header(
     data: Dict[str, Any],
     valid_qualifiers: Set[str] = VALID_QUALIFIERS,
     valid_currencies: Set[str] = VALID_CURRENCIES
 ) -> None:
-    required_fields = {
-        "message_ref": str,
-        "doc_code": str,
-        "doc_number": str,
-        "parties": list,
-        "items": list,
-        "edifact_version": str
-    }
-
-    for field, field_type in required_fields.items():
+    """Validate everything in the PRICAT data except the individual items."""
+    for field, field_type in REQUIRED_FIELDS.items():
         if field not in data:
             raise PRICATValidationError(f"Missing required field: {field}")
         if not isinstance(data[field], field_type):
@@ -66,7 +138,7 @@ def validate_data(
             raise PRICATValidationError(f"Field {field} cannot be empty")
 
     edifact_version = data["edifact_version"].upper()
-    if not re.match(r"^[A-Z]:\d{2}[A-Z]:UN$", edifact_version):
+    if not EDIFACT_VERSION_RE.match(edifact_version):
         raise PRICATValidationError("Invalid EDIFACT version format")
 
     currency = data.get("currency", "EUR")
@@ -74,83 +146,110 @@ def validate_data(
         raise PRICATValidationError(f"Invalid currency code: {currency}. Must be one of {valid_currencies}")
 
     for party in data["parties"]:
-        if not all(k in party for k in ("qualifier", "id")):
+        if not REQUIRED_PARTY_KEYS <= party.keys():
             raise PRICATValidationError("Each party must have 'qualifier' and 'id'")
         if party["qualifier"] not in valid_qualifiers:
             raise PRICATValidationError(f"Invalid party qualifier: {party['qualifier']}")
         if not isinstance(party["id"], str) or not party["id"]:
             raise PRICATValidationError("Party ID must be a non-empty string")
 
-    for item in data["items"]:
-        if not all(k in item for k in ("product_code", "description", "price")):
-            raise PRICATValidationError("Each item requires product_code, description, and price")
-        if not isinstance(item["product_code"], str) or not item["product_code"]:
-            raise PRICATValidationError("Product code must be a non-empty string")
-        if not isinstance(item["description"], str) or not item["description"]:
-            raise PRICATValidationError("Description must be a non-empty string")
-        validate_price(item["price"])
-        if "quantity" in item:
-            if not isinstance(item["quantity"], (int, float)) or item["quantity"] <= 0:
-                raise PRICATValidationError("Quantity must be a positive number")
-
-def generate_edi_segments(data: Dict[str, Any], strict: bool = False) -> Tuple[List[str], Decimal, int]:
-    segments = [
-        UNA_SEGMENT,
-        f"UNH+{data['message_ref']}+PRICAT:{data['edifact_version'].upper()}'",
-        f"BGM+{data['doc_code']}+{data['doc_number']}+9'",
-        f"DTM+137:{datetime.datetime.now().strftime('%Y%m%d')}:102'",
-        f"CUX+2:{data.get('currency', 'EUR')}:9'",
-        f"RFF+ON:{data['doc_number']}'"
-    ]
-    
-    for party in data['parties']:
-        segments.append(f"NAD+{party['qualifier']}+{party['id']}::91'")
-        logger.debug("Added party segment: NAD+%s+%s::91", party['qualifier'], party['id'])
-
-    total_amount = Decimal("0.00")
-    item_count = 0
+def validate_data(
+    data: Dict[str, Any],
+    valid_qualifiers: Set[str] = VALID_QUALIFIERS,
+    valid_currencies: Set[str] = VALID_CURRENCIES
+) -> List[ValidatedItem]:
+    validate_header(data, valid_qualifiers, valid_currencies)
+    return [validate_item(index, item) for index, item in enumerate(data["items"], start=1)]
 
-    for index, item in enumerate(data['items'], start=1):
-        try:
-            price = validate_price(item["price"])
-            description = escape_edifact(item["description"])
+def write_edi_segments(
+    out: TextIO,
+    data: Dict[str, Any],
+    strict: bool = False
+) -> Tuple[int, int, str]:
+    """Write the complete PRICAT message to out, one segment per line.
 
-            segments.extend([
-                f"LIN+{index}++{item['product_code']}:EN'",
-                f"IMD+F++:::{description}'",
-                f"PRI+AAA:{price:.2f}:UP'",
-                f"PRI+AAB:{price:.2f}:UP'"
-            ])
+    Each item is validated, formatted and written in a single pass over
+    data["items"], and the UNT count is tracked as a running counter, so out
+    may be an open file for arbitrarily large catalogs. Invalid items are
+    skipped with a warning, or raise PRICATValidationError if strict.
+    Returns the total in cents, the item count and the currency.
+    """
+    today = datetime.date.today().strftime("%Y%m%d")
+    currency = data.get("currency", "EUR")
+    doc_number = data["doc_number"]
+    edifact_version = data["edifact_version"].upper()
+    write = out.write
+    write(
+        f"{UNA_SEGMENT}\n"
+        f"UNH+{data['message_ref']}+PRICAT:{edifact_version}'\n"
+        f"BGM+{data['doc_code']}+{doc_number}+9'\n"
+        f"DTM+137:{today}:102'\n"
+        f"CUX+2:{currency}:9'\n"
+        f"RFF+ON:{doc_number}'\n"
+    )
+    # UNT counts the segments from UNH through the last item segment
+    segment_count = 5
+
+    debug = logger.isEnabledFor(logging.DEBUG)
 
-            if "quantity" in item:
-                unit = item.get("unit", "PCE")
-                segments.append(f"QTY+47:{item['quantity']}:{unit}'")
-                logger.debug("Added quantity segment for item %d: %s", index, item['product_code'])
+    parties = data['parties']
+    write("".join([f"NAD+{party['qualifier']}+{party['id']}::91'\n" for party in parties]))
+    segment_count += len(parties)
+    if debug:
+        for party in parties:
+            logger.debug("Added party segment: NAD+%s+%s::91", party['qualifier'], party['id'])
 
-            total_amount += price
-            item_count += 1
-            logger.debug("Added item %d: %s, price: %.2f", index, item['product_code'], price)
+    total_cents = 0
+    item_count = 0
 
+    for index, item in enumerate(data['items'], start=1):
+        try:
+            _, product_code, description, price_cents, quantity, unit = validate_item(index, item)
         except (KeyError, PRICATValidationError) as e:
-            logger.warning("Invalid item %d (%s): %s", index, item.get('product_code', 'unknown'), e)
             if strict:
                 raise PRICATValidationError(f"Invalid item {index}: {e}")
+            logger.warning("Invalid item %d (%s): %s", index, item.get('product_code', 'unknown'), e)
             continue
 
-    return segments, total_amount, item_count
+        price_str = format_cents(price_cents)
+        write(format_item_segments(index, product_code, escape_edifact(description), price_str))
+        segment_count += 4
 
-def generate_pricat(data: Dict[str, Any], filename: Optional[str] = "pricat.edi", overwrite: bool = False) -> str:
-    try:
-        validate_data(data)
-        segments, total_amount, item_count = generate_edi_segments(data)
+        if quantity is not None:
+            write(f"QTY+47:{quantity}:{unit}'\n")
+            segment_count += 1
+            if debug:
+                logger.debug("Added quantity segment for item %d: %s", index, product_code)
+
+        total_cents += price_cents
+        item_count += 1
+        if debug:
+            logger.debug("Added item %d: %s, price: %s", index, product_code, price_str)
 
-        currency = data.get("currency", "EUR")
-        segments.extend([
-            f"MOA+86:{total_amount:.2f}:{currency}'",
-            f"UNT+{len(segments) - 1}+{data['message_ref']}'"
-        ])
+    write(f"MOA+86:{format_cents(total_cents)}:{currency}'\n")
+    write(f"UNT+{segment_count}+{data['message_ref']}'")
 
-        edifact_message = "\n".join(segments)
+    return total_cents, item_count, currency
+
+def write_file_bytes(filename: str, payload: bytes) -> None:
+    """Write payload to filename through a raw file descriptor, bypassing TextIOWrapper."""
+    fd = os.open(filename, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+    try:
+        view = memoryview(payload)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+def generate_pricat(data: Dict[str, Any], filename: Optional[str] = "pricat.edi", overwrite: bool = False) -> PricatResult:
+    try:
+        validate_header(data)
+        # Items are validated while they are written; any invalid item aborts
+        # the message before anything reaches the output file.
+        buf = io.StringIO()
+        total_cents, item_count, currency = write_edi_segments(buf, data, strict=True)
+        edifact_message = buf.getvalue()
+        result = PricatResult(edifact_message, edifact_message.encode("utf-8"))
 
         if filename:
             if os.path.exists(filename) and not overwrite:
@@ -162,22 +261,21 @@ def generate_pricat(data: Dict[str, Any], filename: Optional[str] = "pricat.edi"
             os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
 
             try:
-                with open(filename, "w", encoding="utf-8") as f:
-                    f.write(edifact_message)
+                write_file_bytes(filename, result.payload)
                 logger.info("PRICAT saved to %s", filename)
             except OSError as e:
                 logger.error("File write error: %s", e)
                 raise
 
-        logger.info("Generated PRICAT with %d items, total %.2f %s", item_count, total_amount, currency)
-        return edifact_message
+        logger.info("Generated PRICAT with %d items, total %s %s", item_count, format_cents(total_cents), currency)
+        return result
 
     except PRICATValidationError as e:
         logger.error("Validation failed: %s", e)
-        return ""
+        return EMPTY_RESULT
     except Exception as e:
         logger.exception("Unexpected error generating PRICAT: %s", e)
-        return ""
+        return EMPTY_RESULT
 
 if __name__ == "__main__":
     pricat_data = {
@@ -200,4 +298,4 @@ if __name__ == "__main__":
     edi_message = generate_pricat(pricat_data, "output/output.edi", overwrite=False)
     if edi_message:
         print("Generated PRICAT:")
-        print(edi_message)
+        print(edi_message.text)